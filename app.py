@@ -1,69 +1,190 @@
 import os
-import json
+import re
+import hmac
+import inspect
+import time
 import asyncio
 import aiohttp
+import orjson
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request, HTTPException
-from fastapi.responses import StreamingResponse, JSONResponse, PlainTextResponse
-from typing import Dict, Any, Optional
+from fastapi.responses import Response, StreamingResponse, ORJSONResponse
+from starlette.background import BackgroundTask
+from typing import Dict, Any, Final, List, Optional
+from yarl import URL
 
 # --- Config ---
 N8N_URL = os.environ.get("N8N_URL", "").rstrip("/")
 N8N_API_KEY = os.environ.get("N8N_API_KEY", "")
 MCP_BEARER = os.environ.get("MCP_BEARER", "change-me")
+_EXPECTED_AUTH = ("Bearer " + MCP_BEARER).encode()
+LIST_CACHE_TTL = float(os.environ.get("LIST_CACHE_TTL", "3"))
+HEALTH_CACHE_TTL = float(os.environ.get("HEALTH_CACHE_TTL", "5"))
+HEALTH_FAILURE_TTL = 1.0
+
+# URLs n8n pré-construites : aiohttp les utilise sans re-parser de chaîne
+N8N_BASE_URL = URL(N8N_URL)
+WORKFLOWS_URL = N8N_BASE_URL / "rest" / "workflows"
+HEALTH_PROBE_URL = WORKFLOWS_URL.with_query(limit=1)
 
 HEADERS = {
     "X-N8N-API-KEY": N8N_API_KEY,
     "Content-Type": "application/json",
 }
 
+# --- Sessions HTTP partagées (créées au démarrage, stockées sur app.state) ---
+# app.state.http porte la clé API n8n ; app.state.webhook_http ne l'envoie
+# pas aux webhooks.
+HTTP_TIMEOUT = aiohttp.ClientTimeout(total=30, sock_connect=5)
+# Webhooks "respond when last node finishes" : la durée dépend du workflow,
+# on garde le plafond par défaut d'aiohttp (300 s)
+WEBHOOK_TIMEOUT = aiohttp.ClientTimeout(total=300, sock_connect=5)
+# Lecture en streaming : pas de plafond global (la liste peut être longue),
+# seulement un délai maximal entre deux blocs reçus
+STREAM_TIMEOUT = aiohttp.ClientTimeout(total=None, sock_connect=5, sock_read=30)
+
+def _make_connector(limit_per_host: int) -> aiohttp.TCPConnector:
+    # limit=0 : seul le plafond par hôte s'applique, chaque session a son pool
+    return aiohttp.TCPConnector(
+        limit=0,
+        limit_per_host=limit_per_host,
+        ttl_dns_cache=300,
+        keepalive_timeout=75,
+        enable_cleanup_closed=True,
+    )
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Ouvre les sessions aiohttp au démarrage et les ferme à l'arrêt"""
+    app.state.http = aiohttp.ClientSession(
+        headers=HEADERS, connector=_make_connector(32), timeout=HTTP_TIMEOUT
+    )
+    # Pool webhook plus petit : un webhook lent ne peut pas affamer l'API REST
+    app.state.webhook_http = aiohttp.ClientSession(
+        connector=_make_connector(8), timeout=WEBHOOK_TIMEOUT
+    )
+    try:
+        yield
+    finally:
+        await app.state.http.close()
+        await app.state.webhook_http.close()
+
 # --- Init FastAPI ---
-app = FastAPI(title="n8n-mcp-proxy")
+app = FastAPI(
+    title="n8n-mcp-proxy",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
+)
 
 # --- Middleware pour sécuriser /sse ---
-@app.middleware("http")
-async def bearer_auth(request: Request, call_next):
-    if request.url.path == "/sse":
-        auth = request.headers.get("authorization", "")
-        if not auth.startswith("Bearer ") or auth.split(" ", 1)[1] != MCP_BEARER:
-            return PlainTextResponse("Unauthorized", status_code=401)
-    return await call_next(request)
+def _authorization(scope) -> bytes:
+    """Valeur brute de l'en-tête Authorization, lue directement dans le scope ASGI"""
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            return value
+    return b""
+
+class BearerAuthMiddleware:
+    """Middleware ASGI pur : vérifie le Bearer token avant l'app enveloppée"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        if not hmac.compare_digest(_authorization(scope), _EXPECTED_AUTH):
+            await send({
+                "type": "http.response.start",
+                "status": 401,
+                "headers": [
+                    (b"content-type", b"text/plain; charset=utf-8"),
+                    (b"content-length", b"12"),
+                ],
+            })
+            await send({"type": "http.response.body", "body": b"Unauthorized"})
+            return
+        await self.app(scope, receive, send)
 
 # --- Fonctions utilitaires API n8n ---
-async def _n8n_get(path: str) -> Dict[str, Any]:
-    """Execute GET request to n8n API"""
-    async with aiohttp.ClientSession(headers=HEADERS) as session:
-        async with session.get(f"{N8N_URL}{path}") as response:
-            text = await response.text()
-            if response.status >= 400:
-                raise HTTPException(response.status, text)
-            return json.loads(text) if text else {}
-
-async def _n8n_post(path: str, data: dict) -> Dict[str, Any]:
-    """Execute POST request to n8n API"""
-    async with aiohttp.ClientSession(headers=HEADERS) as session:
-        async with session.post(f"{N8N_URL}{path}", data=json.dumps(data)) as response:
-            text = await response.text()
-            if response.status >= 400:
-                raise HTTPException(response.status, text)
-            return json.loads(text) if text else {}
-
-async def _n8n_patch(path: str, data: dict) -> Dict[str, Any]:
-    """Execute PATCH request to n8n API"""
-    async with aiohttp.ClientSession(headers=HEADERS) as session:
-        async with session.patch(f"{N8N_URL}{path}", data=json.dumps(data)) as response:
-            text = await response.text()
-            if response.status >= 400:
-                raise HTTPException(response.status, text)
-            return json.loads(text) if text else {}
-
-async def _n8n_delete(path: str) -> Dict[str, Any]:
-    """Execute DELETE request to n8n API"""
-    async with aiohttp.ClientSession(headers=HEADERS) as session:
-        async with session.delete(f"{N8N_URL}{path}") as response:
-            text = await response.text()
-            if response.status >= 400:
-                raise HTTPException(response.status, text)
-            return {"ok": True, "status": response.status, "body": text}
+async def _n8n(method: str, url: URL, data: Optional[dict] = None, raw: bool = False) -> Any:
+    """Execute a request to n8n API (raw=True renvoie le corps en bytes, non parsé)"""
+    body = orjson.dumps(data) if data is not None else None
+    async with app.state.http.request(method, url, data=body) as response:
+        if response.status >= 400:
+            raise HTTPException(response.status, await response.text())
+        if raw and "json" not in response.content_type:
+            # Un corps non-JSON ne peut pas être recopié tel quel dans la réponse
+            raise HTTPException(502, f"Unexpected n8n content type: {response.content_type}")
+        content = await response.read()
+        if raw:
+            return content
+        if not content:
+            return {}
+        if method == "DELETE":
+            # Une suppression réussie (2xx) ne doit jamais être signalée en
+            # échec parce que n8n (ou un proxy) répond avec un corps non-JSON
+            return _decode_body(response.content_type, content)
+        return orjson.loads(content)
+
+# --- Cache court pour list_workflows ---
+# "gen" est incrémenté à chaque mutation : un GET lancé avant une mutation
+# ne doit pas remettre en cache une liste déjà périmée.
+_list_cache: Dict[str, Any] = {"data": None, "exp": 0.0, "gen": 0}
+_list_lock = asyncio.Lock()
+
+def _invalidate_list_cache() -> None:
+    _list_cache["exp"] = 0.0
+    _list_cache["gen"] += 1
+
+async def _cached_list_workflows() -> orjson.Fragment:
+    """GET /rest/workflows avec cache TTL et une seule requête en vol
+
+    Le corps n8n n'est jamais parsé : il est gardé tel quel dans un
+    orjson.Fragment, recopié verbatim lors de l'encodage de la réponse.
+    """
+    if time.monotonic() < _list_cache["exp"]:
+        return _list_cache["data"]
+    async with _list_lock:
+        if time.monotonic() < _list_cache["exp"]:
+            return _list_cache["data"]
+        gen = _list_cache["gen"]
+        data = orjson.Fragment(await _n8n("GET", WORKFLOWS_URL, raw=True) or b"{}")
+        if gen == _list_cache["gen"]:
+            _list_cache.update(data=data, exp=time.monotonic() + LIST_CACHE_TTL)
+        return data
+
+# Chemins webhook acceptés : relatifs à N8N_URL, sans "//" (hôte) ni ".."
+_WEBHOOK_PATH_RE = re.compile(r"/[A-Za-z0-9/_\-.]{1,512}")
+
+def _valid_webhook_path(path: Any) -> bool:
+    return (
+        isinstance(path, str)
+        and _WEBHOOK_PATH_RE.fullmatch(path) is not None
+        and "//" not in path
+        and ".." not in path
+    )
+
+# IDs n8n (numériques ou nanoid) : un seul segment, jamais de "/" ni de ".."
+_WORKFLOW_ID_RE = re.compile(r"[A-Za-z0-9_-]{1,64}")
+
+def _valid_workflow_id(workflow_id: Any) -> bool:
+    return (
+        isinstance(workflow_id, (str, int))
+        and not isinstance(workflow_id, bool)
+        and _WORKFLOW_ID_RE.fullmatch(str(workflow_id)) is not None
+    )
+
+def _decode_body(content_type: str, raw: bytes) -> Any:
+    """Corps de réponse : JSON si le Content-Type l'annonce, texte sinon"""
+    if "json" in content_type:
+        try:
+            return orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            pass
+    return raw.decode("utf-8", "replace")
 
 # --- Tools Implementation ---
 class MCPTools:
@@ -73,153 +194,307 @@ class MCPTools:
     async def list_workflows() -> Dict[str, Any]:
         """Liste tous les workflows n8n"""
         try:
-            data = await _n8n_get("/rest/workflows")
+            data = await _cached_list_workflows()
             return {"success": True, "data": data}
         except Exception as e:
             return {"success": False, "error": str(e)}
     
     @staticmethod
-    async def create_workflow(workflow: dict) -> Dict[str, Any]:
+    async def create_workflow(workflow: Optional[dict] = None) -> Dict[str, Any]:
         """Crée un nouveau workflow n8n"""
         try:
             if not workflow:
                 return {"success": False, "error": "workflow parameter is required"}
-            data = await _n8n_post("/rest/workflows", workflow)
+            data = await _n8n("POST", WORKFLOWS_URL, workflow)
+            _invalidate_list_cache()
             return {"success": True, "data": data}
         except Exception as e:
             return {"success": False, "error": str(e)}
     
     @staticmethod
-    async def set_active(workflow_id: str, active: bool = True) -> Dict[str, Any]:
+    async def set_active(workflow_id: Optional[str] = None, active: bool = True) -> Dict[str, Any]:
         """Active ou désactive un workflow"""
         try:
             if not workflow_id:
                 return {"success": False, "error": "workflow_id is required"}
-            data = await _n8n_patch(f"/rest/workflows/{workflow_id}", {"active": active})
+            if not _valid_workflow_id(workflow_id):
+                return {
+                    "success": False,
+                    "error": "workflow_id must contain only letters, digits, '_' or '-'"
+                }
+            data = await _n8n("PATCH", WORKFLOWS_URL / str(workflow_id), {"active": active})
+            _invalidate_list_cache()
             return {"success": True, "data": data}
         except Exception as e:
             return {"success": False, "error": str(e)}
     
     @staticmethod
-    async def delete_workflow(workflow_id: str) -> Dict[str, Any]:
+    async def delete_workflow(workflow_id: Optional[str] = None) -> Dict[str, Any]:
         """Supprime un workflow"""
         try:
             if not workflow_id:
                 return {"success": False, "error": "workflow_id is required"}
-            data = await _n8n_delete(f"/rest/workflows/{workflow_id}")
+            if not _valid_workflow_id(workflow_id):
+                return {
+                    "success": False,
+                    "error": "workflow_id must contain only letters, digits, '_' or '-'"
+                }
+            data = await _n8n("DELETE", WORKFLOWS_URL / str(workflow_id))
+            _invalidate_list_cache()
             return {"success": True, "data": data}
         except Exception as e:
             return {"success": False, "error": str(e)}
     
     @staticmethod
-    async def run_webhook(path: str, payload: Optional[dict] = None) -> Dict[str, Any]:
+    async def bulk_set_active(items: Optional[List[dict]] = None) -> Dict[str, Any]:
+        """Active ou désactive plusieurs workflows en parallèle"""
+        try:
+            if not items:
+                return {"success": False, "error": "items is required"}
+            results = await asyncio.gather(*(
+                MCPTools.set_active(item.get("workflow_id"), item.get("active", True))
+                for item in items
+            ))
+            return {"success": all(r["success"] for r in results), "results": results}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+    
+    @staticmethod
+    async def bulk_delete_workflow(workflow_ids: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Supprime plusieurs workflows en parallèle"""
+        try:
+            if not workflow_ids:
+                return {"success": False, "error": "workflow_ids is required"}
+            results = await asyncio.gather(*(
+                MCPTools.delete_workflow(workflow_id) for workflow_id in workflow_ids
+            ))
+            return {"success": all(r["success"] for r in results), "results": results}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+    
+    @staticmethod
+    async def bulk_create_workflow(workflows: Optional[List[dict]] = None) -> Dict[str, Any]:
+        """Crée plusieurs workflows n8n en parallèle"""
+        try:
+            if not workflows:
+                return {"success": False, "error": "workflows is required"}
+            results = await asyncio.gather(*(
+                MCPTools.create_workflow(workflow) for workflow in workflows
+            ))
+            return {"success": all(r["success"] for r in results), "results": results}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+    
+    @staticmethod
+    async def run_webhook(path: Optional[str] = None, payload: Optional[dict] = None) -> Dict[str, Any]:
         """Déclenche un workflow via webhook"""
         try:
-            if not path or not path.startswith("/"):
-                return {"success": False, "error": "path must start with /"}
+            if not _valid_webhook_path(path):
+                return {
+                    "success": False,
+                    "error": "path must start with / and contain only letters, digits, '/', '_', '-' or '.'"
+                }
             
             if payload is None:
                 payload = {}
             
-            async with aiohttp.ClientSession() as session:
-                async with session.post(f"{N8N_URL}{path}", json=payload) as response:
-                    try:
-                        body = await response.json()
-                    except:
-                        body = await response.text()
-                    return {"success": True, "status": response.status, "body": body}
+            async with app.state.webhook_http.post(
+                f"{N8N_URL}{path}",
+                data=orjson.dumps(payload),
+                headers={"Content-Type": "application/json"},
+            ) as response:
+                raw = await response.read()
+                body = _decode_body(response.content_type, raw)
+                return {"success": True, "status": response.status, "body": body}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+    
+    @staticmethod
+    async def bulk_run_webhook(calls: Optional[List[dict]] = None) -> Dict[str, Any]:
+        """Déclenche plusieurs webhooks en parallèle"""
+        try:
+            if not calls:
+                return {"success": False, "error": "calls is required"}
+            results = await asyncio.gather(*(
+                MCPTools.run_webhook(call.get("path"), call.get("payload"))
+                for call in calls
+            ))
+            return {"success": all(r["success"] for r in results), "results": results}
         except Exception as e:
             return {"success": False, "error": str(e)}
 
 # --- MCP Message Handler ---
 mcp_tools = MCPTools()
 
+# Table de dispatch nom d'outil -> (coroutine, noms d'arguments acceptés).
+# Les arguments inconnus envoyés par le client sont ignorés, comme avant.
+_TOOLS = {
+    fn.__name__: (fn, frozenset(inspect.signature(fn).parameters))
+    for fn in (
+        mcp_tools.list_workflows,
+        mcp_tools.create_workflow,
+        mcp_tools.set_active,
+        mcp_tools.delete_workflow,
+        mcp_tools.bulk_set_active,
+        mcp_tools.bulk_delete_workflow,
+        mcp_tools.bulk_create_workflow,
+        mcp_tools.run_webhook,
+        mcp_tools.bulk_run_webhook,
+    )
+}
+
+# --- Schémas d'entrée des outils (une seule instance par schéma) ---
+_WORKFLOW_ID_PROP: Final = {"type": "string", "description": "ID du workflow"}
+_ACTIVE_PROP: Final = {"type": "boolean", "description": "État actif", "default": True}
+
+LIST_WORKFLOWS_SCHEMA: Final = {"type": "object", "properties": {}}
+CREATE_WORKFLOW_SCHEMA: Final = {
+    "type": "object",
+    "properties": {
+        "workflow": {"type": "object", "description": "Le workflow JSON n8n"}
+    },
+    "required": ["workflow"]
+}
+SET_ACTIVE_SCHEMA: Final = {
+    "type": "object",
+    "properties": {
+        "workflow_id": _WORKFLOW_ID_PROP,
+        "active": _ACTIVE_PROP
+    },
+    "required": ["workflow_id"]
+}
+DELETE_WORKFLOW_SCHEMA: Final = {
+    "type": "object",
+    "properties": {
+        "workflow_id": _WORKFLOW_ID_PROP
+    },
+    "required": ["workflow_id"]
+}
+BULK_SET_ACTIVE_SCHEMA: Final = {
+    "type": "object",
+    "properties": {
+        "items": {
+            "type": "array",
+            "description": "Liste de {workflow_id, active}",
+            "items": SET_ACTIVE_SCHEMA
+        }
+    },
+    "required": ["items"]
+}
+BULK_DELETE_WORKFLOW_SCHEMA: Final = {
+    "type": "object",
+    "properties": {
+        "workflow_ids": {
+            "type": "array",
+            "description": "IDs des workflows",
+            "items": {"type": "string"}
+        }
+    },
+    "required": ["workflow_ids"]
+}
+BULK_CREATE_WORKFLOW_SCHEMA: Final = {
+    "type": "object",
+    "properties": {
+        "workflows": {
+            "type": "array",
+            "description": "Liste de workflows JSON n8n",
+            "items": {"type": "object"}
+        }
+    },
+    "required": ["workflows"]
+}
+RUN_WEBHOOK_SCHEMA: Final = {
+    "type": "object",
+    "properties": {
+        "path": {"type": "string", "description": "Chemin webhook (commence par /)"},
+        "payload": {"type": "object", "description": "Données à envoyer", "default": {}}
+    },
+    "required": ["path"]
+}
+BULK_RUN_WEBHOOK_SCHEMA: Final = {
+    "type": "object",
+    "properties": {
+        "calls": {
+            "type": "array",
+            "description": "Liste de {path, payload}",
+            "items": RUN_WEBHOOK_SCHEMA
+        }
+    },
+    "required": ["calls"]
+}
+
+# Réponse "initialized" statique : construite et sérialisée une seule fois
+_INITIALIZED_RESPONSE = {
+    "type": "initialized",
+    "capabilities": {
+        "tools": [
+            {
+                "name": "list_workflows",
+                "description": "Liste tous les workflows n8n",
+                "inputSchema": LIST_WORKFLOWS_SCHEMA
+            },
+            {
+                "name": "create_workflow",
+                "description": "Crée un nouveau workflow n8n",
+                "inputSchema": CREATE_WORKFLOW_SCHEMA
+            },
+            {
+                "name": "set_active",
+                "description": "Active ou désactive un workflow",
+                "inputSchema": SET_ACTIVE_SCHEMA
+            },
+            {
+                "name": "delete_workflow",
+                "description": "Supprime un workflow",
+                "inputSchema": DELETE_WORKFLOW_SCHEMA
+            },
+            {
+                "name": "bulk_set_active",
+                "description": "Active ou désactive plusieurs workflows en parallèle",
+                "inputSchema": BULK_SET_ACTIVE_SCHEMA
+            },
+            {
+                "name": "bulk_delete_workflow",
+                "description": "Supprime plusieurs workflows en parallèle",
+                "inputSchema": BULK_DELETE_WORKFLOW_SCHEMA
+            },
+            {
+                "name": "bulk_create_workflow",
+                "description": "Crée plusieurs workflows n8n en parallèle",
+                "inputSchema": BULK_CREATE_WORKFLOW_SCHEMA
+            },
+            {
+                "name": "run_webhook",
+                "description": "Déclenche un workflow via webhook",
+                "inputSchema": RUN_WEBHOOK_SCHEMA
+            },
+            {
+                "name": "bulk_run_webhook",
+                "description": "Déclenche plusieurs webhooks en parallèle",
+                "inputSchema": BULK_RUN_WEBHOOK_SCHEMA
+            }
+        ]
+    }
+}
+_INITIALIZED_BYTES = orjson.dumps(_INITIALIZED_RESPONSE)
+
 async def handle_mcp_message(message: dict) -> dict:
     """Traite les messages MCP entrants"""
     msg_type = message.get("type")
     
     if msg_type == "initialize":
-        return {
-            "type": "initialized",
-            "capabilities": {
-                "tools": [
-                    {
-                        "name": "list_workflows",
-                        "description": "Liste tous les workflows n8n",
-                        "inputSchema": {"type": "object", "properties": {}}
-                    },
-                    {
-                        "name": "create_workflow",
-                        "description": "Crée un nouveau workflow n8n",
-                        "inputSchema": {
-                            "type": "object",
-                            "properties": {
-                                "workflow": {"type": "object", "description": "Le workflow JSON n8n"}
-                            },
-                            "required": ["workflow"]
-                        }
-                    },
-                    {
-                        "name": "set_active",
-                        "description": "Active ou désactive un workflow",
-                        "inputSchema": {
-                            "type": "object",
-                            "properties": {
-                                "workflow_id": {"type": "string", "description": "ID du workflow"},
-                                "active": {"type": "boolean", "description": "État actif", "default": True}
-                            },
-                            "required": ["workflow_id"]
-                        }
-                    },
-                    {
-                        "name": "delete_workflow",
-                        "description": "Supprime un workflow",
-                        "inputSchema": {
-                            "type": "object",
-                            "properties": {
-                                "workflow_id": {"type": "string", "description": "ID du workflow"}
-                            },
-                            "required": ["workflow_id"]
-                        }
-                    },
-                    {
-                        "name": "run_webhook",
-                        "description": "Déclenche un workflow via webhook",
-                        "inputSchema": {
-                            "type": "object",
-                            "properties": {
-                                "path": {"type": "string", "description": "Chemin webhook (commence par /)"},
-                                "payload": {"type": "object", "description": "Données à envoyer", "default": {}}
-                            },
-                            "required": ["path"]
-                        }
-                    }
-                ]
-            }
-        }
+        return _INITIALIZED_RESPONSE
     
     elif msg_type == "tool_call":
         tool_name = message.get("tool", {}).get("name")
-        params = message.get("tool", {}).get("arguments", {})
+        params = message.get("tool", {}).get("arguments") or {}
         
-        if tool_name == "list_workflows":
-            result = await mcp_tools.list_workflows()
-        elif tool_name == "create_workflow":
-            result = await mcp_tools.create_workflow(params.get("workflow"))
-        elif tool_name == "set_active":
-            result = await mcp_tools.set_active(
-                params.get("workflow_id"),
-                params.get("active", True)
-            )
-        elif tool_name == "delete_workflow":
-            result = await mcp_tools.delete_workflow(params.get("workflow_id"))
-        elif tool_name == "run_webhook":
-            result = await mcp_tools.run_webhook(
-                params.get("path"),
-                params.get("payload")
-            )
-        else:
+        tool = _TOOLS.get(tool_name)
+        if tool is None:
             result = {"error": f"Unknown tool: {tool_name}"}
+        else:
+            fn, accepted = tool
+            result = await fn(**{k: v for k, v in params.items() if k in accepted})
         
         return {
             "type": "tool_result",
@@ -242,60 +517,166 @@ async def root():
             "/": "Service info",
             "/health": "Health check",
             "/sse": "SSE endpoint for MCP (requires Bearer auth)",
-            "/mcp": "MCP JSON-RPC endpoint (requires Bearer auth)"
+            "/mcp": "MCP JSON-RPC endpoint (requires Bearer auth)",
+            "/mcp/stream": "Streaming tool_call for list_workflows (requires Bearer auth)"
         },
         "n8n_connected": bool(N8N_URL and N8N_API_KEY)
     }
 
+# Dernier résultat de la sonde n8n : les échecs sont gardés moins longtemps
+_HEALTH: Dict[str, Any] = {"ok": False, "error": None, "exp": 0.0}
+_health_lock = asyncio.Lock()
+
+async def _probe_n8n() -> None:
+    """Rafraîchit _HEALTH si expiré ; les sondes concurrentes n'en font qu'une"""
+    if time.monotonic() < _HEALTH["exp"]:
+        return
+    async with _health_lock:
+        if time.monotonic() < _HEALTH["exp"]:
+            return
+        try:
+            # Test la connexion n8n
+            await _n8n("GET", HEALTH_PROBE_URL)
+            _HEALTH.update(ok=True, error=None, exp=time.monotonic() + HEALTH_CACHE_TTL)
+        except Exception as e:
+            _HEALTH.update(ok=False, error=str(e), exp=time.monotonic() + HEALTH_FAILURE_TTL)
+
 @app.get("/health")
 async def health():
     """Health check endpoint"""
-    try:
-        # Test la connexion n8n
-        await _n8n_get("/rest/workflows?limit=1")
+    await _probe_n8n()
+    
+    if _HEALTH["ok"]:
         return {
             "status": "healthy",
             "n8n": "connected",
             "n8n_url": N8N_URL.replace("https://", "").replace("http://", "")
         }
-    except Exception as e:
-        return JSONResponse(
-            status_code=503,
-            content={"status": "unhealthy", "error": str(e)}
-        )
+    return ORJSONResponse(
+        status_code=503,
+        content={"status": "unhealthy", "error": _HEALTH["error"]}
+    )
+
+def _is_authorized(request: Request) -> bool:
+    """Vérifie le Bearer token d'une requête /mcp"""
+    return hmac.compare_digest(_authorization(request.scope), _EXPECTED_AUTH)
 
 @app.post("/mcp")
 async def mcp_endpoint(request: Request):
     """Endpoint JSON-RPC pour MCP"""
     # Vérification Bearer token
-    auth = request.headers.get("authorization", "")
-    if not auth.startswith("Bearer ") or auth.split(" ", 1)[1] != MCP_BEARER:
-        return JSONResponse(status_code=401, content={"error": "Unauthorized"})
+    if not _is_authorized(request):
+        return ORJSONResponse(status_code=401, content={"error": "Unauthorized"})
     
     try:
-        body = await request.json()
+        body = orjson.loads(await request.body())
+        if body.get("type") == "initialize":
+            return Response(content=_INITIALIZED_BYTES, media_type="application/json")
         response = await handle_mcp_message(body)
-        return JSONResponse(content=response)
+        return ORJSONResponse(content=response)
     except Exception as e:
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=500,
             content={"error": str(e)}
         )
 
-@app.get("/sse")
+# Outils dont la réponse n8n peut être relayée telle quelle, sans parsing
+_STREAMABLE_TOOLS = {"list_workflows": WORKFLOWS_URL}
+
+@app.post("/mcp/stream")
+async def mcp_stream_endpoint(request: Request):
+    """Variante streaming de /mcp : relaie le corps n8n par blocs"""
+    if not _is_authorized(request):
+        return ORJSONResponse(status_code=401, content={"error": "Unauthorized"})
+    
+    try:
+        body = orjson.loads(await request.body())
+        tool_name = (body.get("tool") or {}).get("name")
+        url = _STREAMABLE_TOOLS.get(tool_name)
+        if body.get("type") != "tool_call" or url is None:
+            return ORJSONResponse(
+                status_code=400,
+                content={"error": f"Tool not streamable: {tool_name}"}
+            )
+        upstream = await request.app.state.http.get(url, timeout=STREAM_TIMEOUT)
+    except Exception as e:
+        return ORJSONResponse(
+            status_code=500,
+            content={"error": str(e)}
+        )
+    
+    # Comme _n8n(raw=True) : seul un corps JSON peut être recopié tel quel
+    error = None
+    if upstream.status >= 400:
+        error = f"{upstream.status}: {await upstream.text()}"
+    elif "json" not in upstream.content_type:
+        error = f"502: Unexpected n8n content type: {upstream.content_type}"
+    if error is not None:
+        upstream.release()
+        return ORJSONResponse(content={
+            "type": "tool_result",
+            "tool_call_id": body.get("id"),
+            "result": {"success": False, "error": error}
+        })
+    if upstream.content_length == 0:
+        upstream.release()
+        return ORJSONResponse(content={
+            "type": "tool_result",
+            "tool_call_id": body.get("id"),
+            "result": {"success": True, "data": {}}
+        })
+    
+    # Même enveloppe que /mcp, mais "data" est copié bloc par bloc depuis n8n
+    head = (
+        b'{"type":"tool_result","tool_call_id":' + orjson.dumps(body.get("id"))
+        + b',"result":{"success":true,"data":'
+    )
+    
+    async def relay():
+        try:
+            yield head
+            empty = True
+            async for chunk in upstream.content.iter_chunked(65536):
+                empty = False
+                yield chunk
+            # Corps vide sans Content-Length (chunked) : même résultat que /mcp
+            yield b"{}}}" if empty else b"}}"
+        finally:
+            upstream.release()
+    
+    async def release_upstream():
+        # Le finally de relay() ne s'exécute pas si le client se déconnecte
+        # avant le premier bloc : la tâche de fond libère la connexion dans
+        # tous les cas (release() est idempotent)
+        upstream.release()
+    
+    # Comme /sse : pas de mise en tampon côté reverse proxy (nginx, traefik)
+    return StreamingResponse(
+        relay(),
+        media_type="application/json",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        },
+        background=BackgroundTask(release_upstream)
+    )
+
+# --- Trames SSE statiques, encodées une seule fois ---
+_SSE_INIT_FRAME = b"data: " + orjson.dumps({
+    "type": "initialize",
+    "version": "1.0.0",
+    "capabilities": {
+        "tools": True
+    }
+}) + b"\n\n"
+_SSE_KEEPALIVE = b": keep-alive\n\n"
+
 async def sse_endpoint(request: Request):
     """SSE endpoint pour MCP streaming"""
     async def event_generator():
         try:
             # Envoi du message d'initialisation
-            init_msg = {
-                "type": "initialize",
-                "version": "1.0.0",
-                "capabilities": {
-                    "tools": True
-                }
-            }
-            yield f"data: {json.dumps(init_msg)}\n\n"
+            yield _SSE_INIT_FRAME
             
             # Keep-alive loop
             while True:
@@ -304,13 +685,13 @@ async def sse_endpoint(request: Request):
                     
                 # Envoie un ping toutes les 30 secondes
                 await asyncio.sleep(30)
-                yield f": keep-alive\n\n"
+                yield _SSE_KEEPALIVE
                 
         except asyncio.CancelledError:
             pass
         except Exception as e:
             error_msg = {"type": "error", "error": str(e)}
-            yield f"data: {json.dumps(error_msg)}\n\n"
+            yield b"data: " + orjson.dumps(error_msg) + b"\n\n"
     
     return StreamingResponse(
         event_generator(),
@@ -323,11 +704,21 @@ async def sse_endpoint(request: Request):
         }
     )
 
+# /sse est la seule route authentifiée par middleware : seule son app ASGI
+# est enveloppée, les autres routes n'ont aucun middleware applicatif à
+# traverser. La route reste une APIRoute, donc documentée dans /openapi.json.
+app.add_api_route("/sse", sse_endpoint, methods=["GET"])
+_sse_route = app.router.routes[-1]
+_sse_route.app = BearerAuthMiddleware(_sse_route.app)
+
 # --- Pour test local ---
 if __name__ == "__main__":
+    import sys
     import uvicorn
     port = int(os.environ.get("PORT", 8080))
     print(f"Starting n8n-mcp-proxy on port {port}")
     print(f"N8N URL: {N8N_URL}")
     print(f"Bearer Token configured: {bool(MCP_BEARER)}")
-    uvicorn.run(app, host="0.0.0.0", port=port)
+    # uvloop n'existe pas sous Windows : repli sur la boucle asyncio standard
+    loop = "asyncio" if sys.platform == "win32" else "uvloop"
+    uvicorn.run(app, host="0.0.0.0", port=port, loop=loop, http="httptools")